@@ -13,6 +13,25 @@ try:
 except Exception:
     mcrf4xx = None
 
+
+def _gen_crc16_table():
+    """build the byte-wise lookup table for CRC-16/MCRF4XX"""
+    poly = 0x8408
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ poly
+            else:
+                crc >>= 1
+        table.append(crc)
+    return table
+
+
+_crc16_table = _gen_crc16_table()
+
+
 class x25crc_slow(object):
     """CRC-16/MCRF4XX - based on checksum.h from mavlink library"""
 
@@ -33,10 +52,9 @@ class x25crc_slow(object):
             buf = buf.encode()
 
         accum = self.crc
+        table = _crc16_table
         for b in buf:
-            tmp = b ^ (accum & 0xFF)
-            tmp = (tmp ^ (tmp << 4)) & 0xFF
-            accum = (accum >> 8) ^ (tmp << 8) ^ (tmp << 3) ^ (tmp >> 4)
+            accum = (accum >> 8) ^ table[(accum ^ b) & 0xFF]
         self.crc = accum
 
     def accumulate_str(self, buf):
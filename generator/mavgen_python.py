@@ -10,6 +10,7 @@ from __future__ import print_function
 from builtins import range
 
 import os
+import struct
 import sys
 import textwrap
 from . import mavtemplate
@@ -124,6 +125,7 @@ Generated from: ${FILELIST}
 Note: this file has been auto-generated. DO NOT EDIT
 """
 import hashlib
+import hmac
 import json
 import logging
 import os
@@ -141,11 +143,26 @@ PROTOCOL_MARKER_V2 = 0xFD
 HEADER_LEN_V1 = 6
 HEADER_LEN_V2 = 10
 
+_MARKER_V1_BYTE = struct.pack("B", PROTOCOL_MARKER_V1)
+_MARKER_V2_BYTE = struct.pack("B", PROTOCOL_MARKER_V2)
+
+# bound once so the per-frame checksum read is a single call with no
+# attribute traversal
+_CSUM_UNPACK = struct.Struct("<H").unpack_from
+
 MAVLINK_SIGNATURE_BLOCK_LEN = 13
 
 MAVLINK_IFLAG_SIGNED = 0x01
 
-if sys.version_info[0] == 2:
+# bind the constructor once; hashlib.new("sha256") resolves the digest
+# by name on every call
+_sha256 = hashlib.sha256
+
+# evaluated once; the decode paths must not pay for a version tuple
+# comparison per call
+_PY2 = sys.version_info[0] == 2
+
+if _PY2:
     logging.basicConfig()
 
 logger = logging.getLogger(__name__)
@@ -167,8 +184,35 @@ MAVLINK_TYPE_INT64_T = 8
 MAVLINK_TYPE_FLOAT = 9
 MAVLINK_TYPE_DOUBLE = 10
 
+# use the compiled CRC from the optional fastcrc package when it is
+# installed; it processes whole buffers per call instead of one byte
+# per python bytecode loop iteration
+try:
+    import fastcrc
+    mcrf4xx = fastcrc.crc16.mcrf4xx
+except Exception:
+    mcrf4xx = None
+
+
+def _gen_crc16_table()${type_int_list_ret}:
+    """build the byte-wise lookup table for CRC-16/MCRF4XX"""
+    poly = 0x8408
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ poly
+            else:
+                crc >>= 1
+        table.append(crc)
+    return table
+
+
+_crc16_table = _gen_crc16_table()
 
-class x25crc(object):
+
+class x25crc_slow(object):
     """CRC-16/MCRF4XX - based on checksum.h from mavlink library"""
 
     def __init__(self, buf${type_optional_intseq_default})${type_none_ret}:
@@ -177,21 +221,55 @@ class x25crc(object):
             self.accumulate(buf)
 
     def accumulate(self, buf${type_intseq})${type_none_ret}:
-        """add in some more bytes (it also accepts python2 strings)"""
-        if sys.version_info[0] == 2 and type(buf) is str:
+        """add in some more bytes (it also accepts python2 strings and
+        memoryviews)"""
+        if _PY2 and type(buf) is not bytearray:
             buf = bytearray(buf)
 
         accum = self.crc
+        table = _crc16_table
         for b in buf:
-            tmp = b ^ (accum & 0xFF)
-            tmp = (tmp ^ (tmp << 4)) & 0xFF
-            accum = (accum >> 8) ^ (tmp << 8) ^ (tmp << 3) ^ (tmp >> 4)
+            accum = (accum >> 8) ^ table[(accum ^ b) & 0xFF]
         self.crc = accum
 
+    def accumulate_byte(self, byte${type_int})${type_none_ret}:
+        """add in a single byte without building a one-byte buffer"""
+        self.crc = (self.crc >> 8) ^ _crc16_table[(self.crc ^ byte) & 0xFF]
+
+
+class x25crc_fast(object):
+    """CRC-16/MCRF4XX computed by the compiled fastcrc extension"""
+
+    def __init__(self, buf${type_optional_intseq_default})${type_none_ret}:
+        self.crc = 0xFFFF
+        if buf is not None:
+            self.accumulate(buf)
+
+    def accumulate(self, buf${type_intseq})${type_none_ret}:
+        """add in some more bytes (it also accepts memoryviews)"""
+        if type(buf) is not bytes:
+            buf = bytes(buf)
+        self.crc = mcrf4xx(buf, self.crc)
+
+    def accumulate_byte(self, byte${type_int})${type_none_ret}:
+        """add in a single byte without building a one-byte buffer"""
+        self.crc = mcrf4xx(struct.pack("B", byte), self.crc)
+
+
+# bind the implementation once at import so the hot paths carry no
+# per-call feature test
+if mcrf4xx is not None:
+    x25crc = x25crc_fast
+else:
+    x25crc = x25crc_slow
+
 
 class MAVLink_header(object):
     """MAVLink message header"""
 
+    _packer_v1 = struct.Struct("<BBBBBB")
+    _packer_v2 = struct.Struct("<BBBBBBBHB")
+
     def __init__(self, msgId${type_int}, incompat_flags${type_int_default}, compat_flags${type_int_default}, mlen${type_int_default}, seq${type_int_default}, srcSystem${type_int_default}, srcComponent${type_int_default})${type_none_ret}:
         self.mlen = mlen
         self.seq = seq
@@ -203,8 +281,7 @@ class MAVLink_header(object):
 
     def pack(self, force_mavlink1${type_bool_default})${type_bytes_ret}:
         if float(WIRE_PROTOCOL_VERSION) == 2.0 and not force_mavlink1:
-            return struct.pack(
-                "<BBBBBBBHB",
+            return self._packer_v2.pack(
                 ${protocol_marker},
                 self.mlen,
                 self.incompat_flags,
@@ -215,8 +292,7 @@ class MAVLink_header(object):
                 self.msgId & 0xFFFF,
                 self.msgId >> 16,
             )
-        return struct.pack(
-            "<BBBBBB",
+        return self._packer_v1.pack(
             PROTOCOL_MARKER_V1,
             self.mlen,
             self.seq,
@@ -243,12 +319,16 @@ class MAVLink_message(object):
     array_lengths${type_int_list} = []
     crc_extra = 0
     unpacker = struct.Struct("")
+    csize = 0
     instance_field${type_optional_str} = None
     instance_offset = -1
+    _crc_packer = struct.Struct("<H")
+    _crc_extra_byte = b"\\x00"
 
     def __init__(self, msgId${type_int}, name${type_str})${type_none_ret}:
         self._header = MAVLink_header(msgId)
         self._payload${type_optional_bytes} = None
+        self._payload_end = 0
         self._msgbuf = bytearray(b"")
         self._crc${type_optional_int} = None
         self._fieldnames${type_str_list} = []
@@ -262,8 +342,9 @@ class MAVLink_message(object):
         """override field getter"""
         raw_attr = cast(${type_mavlink_message_attr_cast}, getattr(self, field))
         if isinstance(raw_attr, bytes):
-            if sys.version_info[0] == 2:
-                return raw_attr.rstrip(b"\\x00")
+            # char fields are stored decoded by the generated constructors;
+            # this single C-level decode only runs for raw bytes payloads
+            # such as BAD_DATA
             return raw_attr.decode(errors="backslashreplace").rstrip("\\x00")
         return raw_attr
 
@@ -274,6 +355,9 @@ class MAVLink_message(object):
         return self._header
 
     def get_payload(self)${type_optional_bytes_ret}:
+        if self._payload is None and self._payload_end != 0:
+            # deferred by decode; most consumers never read the payload back
+            self._payload = bytes(self._msgbuf[6 : self._payload_end])
         return self._payload
 
     def get_crc(self)${type_optional_int_ret}:
@@ -353,51 +437,69 @@ class MAVLink_message(object):
         return json.dumps(self.to_dict())
 
     def sign_packet(self, mav${type_mavlink})${type_none_ret}:
-        assert mav.signing.secret_key is not None
-
-        h = hashlib.new("sha256")
-        self._msgbuf += struct.pack("<BQ", mav.signing.link_id, mav.signing.timestamp)[:7]
-        h.update(mav.signing.secret_key)
-        h.update(self._msgbuf)
-        sig = h.digest()[:6]
-        self._msgbuf += sig
-        mav.signing.timestamp += 1
-
-    def _pack(self, mav${type_mavlink}, crc_extra${type_int}, payload${type_bytes}, force_mavlink1${type_bool_default})${type_bytes_ret}:
-        plen = len(payload)
+        # hoist the chained mav.signing lookups into locals; this runs for
+        # every outgoing signed packet
+        signing = mav.signing
+        assert signing.secret_key is not None
+        timestamp = signing.timestamp
+
+        # the signature block (link id, 48-bit timestamp, 6-byte signature)
+        # is preallocated by _finalize; fill it in place
+        buf = self._msgbuf
+        struct.pack_into(
+            "<BIH",
+            buf,
+            len(buf) - MAVLINK_SIGNATURE_BLOCK_LEN,
+            signing.link_id,
+            timestamp & 0xFFFFFFFF,
+            (timestamp >> 32) & 0xFFFF,
+        )
+        # a single one-shot digest call is cheaper than building a hash
+        # object and feeding it two updates
+        sig = _sha256(signing.secret_key + buf[:-6]).digest()[:6]
+        buf[-6:] = sig
+        signing.timestamp = timestamp + 1
+
+    def _finalize(self, mav${type_mavlink}, buf${type_bytearray}, header_len${type_int}, force_mavlink1${type_bool_default})${type_bytes_ret}:
+        """fix up and CRC a frame packed by the per-class fused packer.
+
+        buf holds the header (with a zero length byte) followed by the
+        full-size payload; the payload is trimmed in place for MAVLink2.
+        """
+        plen = len(buf) - header_len
         if float(WIRE_PROTOCOL_VERSION) == 2.0 and not force_mavlink1:
             # in MAVLink2 we can strip trailing zeros off payloads. This allows for simple
-            # variable length arrays and smaller packets
-            if sys.version_info[0] == 2:
-                nullbyte = chr(0)
-            else:
-                nullbyte = 0
-            while plen > 1 and payload[plen - 1] == nullbyte:
-                plen -= 1
-        self._payload = payload[:plen]
-        incompat_flags = 0
-        if mav.signing.sign_outgoing:
-            incompat_flags |= MAVLINK_IFLAG_SIGNED
-        self._header = MAVLink_header(
-            self._header.msgId,
-            incompat_flags=incompat_flags,
-            compat_flags=0,
-            mlen=len(self._payload),
-            seq=mav.seq,
-            srcSystem=mav.srcSystem,
-            srcComponent=mav.srcComponent,
-        )
-        self._msgbuf = bytearray(self._header.pack(force_mavlink1=force_mavlink1))
-        self._msgbuf += self._payload
-        crc = x25crc(self._msgbuf[1:])
+            # variable length arrays and smaller packets. rstrip scans at C speed; a
+            # payload must keep at least one byte, and stripping can never reach the
+            # header because any overshoot is clamped to a single payload byte (which
+            # is then necessarily zero)
+            plen = max(len(buf.rstrip(b"\\x00")) - header_len, 1)
+            del buf[header_len + plen :]
+        buf[1] = plen
+        self._payload = bytes(buf[header_len:])
+        # update the header allocated in __init__ in place rather than
+        # constructing a fresh MAVLink_header per send
+        header = self._header
+        header.incompat_flags = buf[2] if header_len == HEADER_LEN_V2 else 0
+        header.compat_flags = 0
+        header.mlen = plen
+        header.seq = mav.seq
+        header.srcSystem = mav.srcSystem
+        header.srcComponent = mav.srcComponent
+        self._msgbuf = buf
+        crc = x25crc(buf[1:])
         if ${crc_extra}:
-            # we are using CRC extra
-            crc.accumulate(struct.pack("B", crc_extra))
+            # we are using CRC extra; the single byte is precomputed per class
+            crc.accumulate(self._crc_extra_byte)
         self._crc = crc.crc
-        self._msgbuf += struct.pack("<H", self._crc)
-        if mav.signing.sign_outgoing and not force_mavlink1:
+        sign = mav.signing.sign_outgoing and not force_mavlink1
+        # grow the buffer once for the CRC (and, when signing, the 13-byte
+        # signature block) and write both in place rather than appending
+        buf += b"\\x00" * (2 + (MAVLINK_SIGNATURE_BLOCK_LEN if sign else 0))
+        self._crc_packer.pack_into(buf, header_len + plen, self._crc)
+        if sign:
             self.sign_packet(mav)
-        return bytes(self._msgbuf)
+        return bytes(buf)
 
     def pack(self, mav${type_mavlink}, force_mavlink1${type_bool_default})${type_bytes_ret}:
         raise NotImplementedError("MAVLink_message cannot be serialized directly")
@@ -560,15 +662,63 @@ def generate_classes(outf, msgs, enable_type_annotations):
             else:
                 init_fields.append("self.%s = %s" % (f.name, f.name))
 
-        pack_fields = []
+        # group the pack arguments: scalars (and char arrays, which struct
+        # packs as a single "Ns" value) are passed positionally, while
+        # numeric arrays are splatted via tuple() rather than expanded
+        # element-by-element at codegen time
+        arg_groups = []
+        scalars = []
         for field in m.ordered_fields:
             if field.type == "char":
-                pack_fields.append("self._{0:s}_raw".format(field.name))
+                scalars.append("self._{0:s}_raw".format(field.name))
             elif field.array_length == 0:
-                pack_fields.append("self.{0:s}".format(field.name))
+                scalars.append("self.{0:s}".format(field.name))
             else:
-                for i in range(field.array_length):
-                    pack_fields.append("self.{0:s}[{1:d}]".format(field.name, i))
+                if scalars:
+                    arg_groups.append("(" + ", ".join(scalars) + ",)")
+                    scalars = []
+                arg_groups.append("tuple(self.{0:s})".format(field.name))
+        if scalars:
+            arg_groups.append("(" + ", ".join(scalars) + ",)")
+        has_numeric_array = any(f.array_length and f.type != "char" for f in m.ordered_fields)
+
+        # the message id must be a literal: some messages (LOG_ENTRY,
+        # DISTANCE_SENSOR, ...) declare a field named "id" whose instance
+        # attribute shadows the class-level message id
+        header_args_v1 = "PROTOCOL_MARKER_V1, 0, mav.seq, mav.srcSystem, mav.srcComponent, %d" % m.id
+        header_args_v2 = "PROTOCOL_MARKER_V2, 0, incompat_flags, 0, mav.seq, mav.srcSystem, mav.srcComponent, %d, %d" % (m.id & 0xFFFF, m.id >> 16)
+        if has_numeric_array:
+            tail = " + ".join(arg_groups)
+            pack_args_v1 = "*((%s,) + %s)" % (header_args_v1, tail)
+            pack_args_v2 = "*((%s,) + %s)" % (header_args_v2, tail)
+        else:
+            # no arrays: every argument is a scalar, pass them positionally
+            pack_args_v1 = ", ".join([header_args_v1] + scalars)
+            pack_args_v2 = ", ".join([header_args_v2] + scalars)
+
+        # constructor arguments for unpack(), reordering the flat unpacked
+        # tuple back into declaration order with the offsets resolved at
+        # generation time
+        tuple_offsets = []
+        tip = 0
+        for length in m.len_map:
+            tuple_offsets.append(tip)
+            tip += length
+        unpack_args = []
+        for i in range(len(m.fields)):
+            f = m.fields[i]
+            tip = tuple_offsets[m.order_map[i]]
+            length = m.len_map[m.order_map[i]]
+            if f.type == "char":
+                unpack_args.append('t[%d].rstrip(b"\\x00")' % tip)
+            elif length == 1:
+                unpack_args.append("t[%d]" % tip)
+            else:
+                unpack_args.append("list(t[%d:%d])" % (tip, tip + length))
+        if unpack_args == ["t[%d]" % i for i in range(len(m.fields))]:
+            # all-scalar message already in wire order: splat the tuple
+            # straight into the constructor
+            unpack_args = ["*t"]
 
         t.write(
             outf,
@@ -593,7 +743,11 @@ ${docstring}
     lengths = ${lengths}
     array_lengths = ${array_lengths}
     crc_extra = ${crc_extra}
+    _crc_extra_byte = struct.pack("B", ${crc_extra})
     unpacker = struct.Struct("${fmtstr}")
+    csize = ${csize}
+    _full_packer_v1 = struct.Struct("${fused_fmtstr_v1}")
+    _full_packer_v2 = struct.Struct("${fused_fmtstr_v2}")
     instance_field = ${instance_field}
     instance_offset = ${instance_offset}
 
@@ -605,7 +759,24 @@ ${docstring}
         ${init_fields}
 
     def pack(self, mav${type_mavlink}, force_mavlink1${type_bool_default})${type_bytes_ret}:
-        return self._pack(mav, self.crc_extra, self.unpacker.pack(${pack_fields}), force_mavlink1=force_mavlink1)
+        if float(WIRE_PROTOCOL_VERSION) == 2.0 and not force_mavlink1:
+            incompat_flags = MAVLINK_IFLAG_SIGNED if mav.signing.sign_outgoing else 0
+            buf = bytearray(self._full_packer_v2.pack(${pack_args_v2}))
+            return self._finalize(mav, buf, HEADER_LEN_V2, force_mavlink1=force_mavlink1)
+        buf = bytearray(self._full_packer_v1.pack(${pack_args_v1}))
+        return self._finalize(mav, buf, HEADER_LEN_V1, force_mavlink1=force_mavlink1)
+
+    @classmethod
+    def unpack(cls, mbuf${type_bytearray}, offset${type_int_default})${unpack_ret}:
+        """construct the message from its zero-padded payload bytes"""
+        t = cast(${type_tuple_bytes_int_float_repeat_cast}, cls.unpacker.unpack_from(mbuf, offset))
+        return cls(${unpack_args})
+
+    def to_dict(self)${type_dict_str_to_str_float_int_ret}:
+        return {
+            "mavpackettype": "${msg_name_upper}",
+            ${to_dict_items}
+        }
 
 
 # Define name on the class for backwards compatibility (it is now msgname).
@@ -624,6 +795,12 @@ setattr(${classname}, "name", mavlink_msg_deprecated_name_property())
                     "field_nums": fieldenums_str,
                     "field_units": fieldunits_str,
                     "fmtstr": m.fmtstr,
+                    "csize": struct.calcsize(m.fmtstr),
+                    # keep the dialect's endian prefix (wire 0.9 is
+                    # big-endian); the v1 header is all single-byte fields
+                    # and v2 framing only exists for little-endian dialects
+                    "fused_fmtstr_v1": m.fmtstr[0] + "BBBBBB" + m.fmtstr[1:],
+                    "fused_fmtstr_v2": m.fmtstr[0] + "BBBBBBBHB" + m.fmtstr[1:],
                     "native_fmtstr": m.native_fmtstr,
                     "orders": m.order_map,
                     "lengths": m.len_map,
@@ -633,7 +810,13 @@ setattr(${classname}, "name", mavlink_msg_deprecated_name_property())
                     "instance_offset": instance_offset,
                     "arg_fields": ", ".join(arg_fields),
                     "init_fields": "\n        ".join(init_fields),
-                    "pack_fields": ", ".join(pack_fields),
+                    "pack_args_v1": pack_args_v1,
+                    "pack_args_v2": pack_args_v2,
+                    "unpack_args": ", ".join(unpack_args),
+                    "to_dict_items": "\n            ".join(
+                        '"%s": self.%s,' % (name, name) for name in m.fieldnames
+                    ),
+                    "unpack_ret": ' -> "%s"' % classname if enable_type_annotations else "",
                 },
                 enable_type_annotations,
             ),
@@ -762,7 +945,7 @@ class MAVLink_bad_data(MAVLink_message):
 
     def __str__(self)${type_str_ret}:
         """Override the __str__ function from MAVLink_messages because non-printable characters are common in to be the reason for this message to exist."""
-        if sys.version_info[0] == 2:
+        if _PY2:
             hexstr = ["{:x}".format(ord(i)) for i in self.data]
         else:
             hexstr = ["{:x}".format(i) for i in self.data]
@@ -783,7 +966,7 @@ class MAVLink_unknown(MAVLink_message):
 
     def __str__(self)${type_str_ret}:
         """Override the __str__ function from MAVLink_messages because non-printable characters are common."""
-        if sys.version_info[0] == 2:
+        if _PY2:
             hexstr = ["{:x}".format(ord(i)) for i in self.data]
         else:
             hexstr = ["{:x}".format(i) for i in self.data]
@@ -899,70 +1082,144 @@ class MAVLink(object):
 
         return m
 
-    def __parse_char_legacy(self)${type_optional_mavlink_message_ret}:
+    def __parse_char_legacy(
+        self,
+        MARKER_V1${type_int} = PROTOCOL_MARKER_V1,
+        MARKER_V2${type_int} = PROTOCOL_MARKER_V2,
+        IFLAG_SIGNED${type_int} = MAVLINK_IFLAG_SIGNED,
+    )${type_optional_mavlink_message_ret}:
         """input some data bytes, possibly returning a new message"""
-        header_len = HEADER_LEN_V1
-        if self.buf_len() >= 1 and self.buf[self.buf_index] == PROTOCOL_MARKER_V2:
-            header_len = HEADER_LEN_V2
+        # cache the buffer, index and remaining length in locals, and bind
+        # the module constants as defaults so they resolve as fast locals;
+        # this method runs once per received frame (or byte, when
+        # dribble-fed)
+        buf = self.buf
+        idx = self.buf_index
+        remaining = len(buf) - idx
 
+        header_len = HEADER_LEN_V1
         m${type_optional_mavlink_message} = None
-        if self.buf_len() >= 1 and self.buf[self.buf_index] != PROTOCOL_MARKER_V1 and self.buf[self.buf_index] != PROTOCOL_MARKER_V2:
-            magic = self.buf[self.buf_index]
-            self.buf_index += 1
-            if self.robust_parsing:
-                m = MAVLink_bad_data(bytearray([magic]), "Bad prefix")
-                self.expected_length = header_len + 2
+        if remaining >= 1:
+            magic = buf[idx]
+            if magic == MARKER_V2:
+                header_len = HEADER_LEN_V2
+            elif magic != MARKER_V1:
+                self.buf_index = idx + 1
+                if self.robust_parsing:
+                    m = MAVLink_bad_data(bytearray([magic]), "Bad prefix")
+                    self.expected_length = header_len + 2
+                    self.total_receive_errors += 1
+                    return m
+                if self.have_prefix_error:
+                    return None
+                self.have_prefix_error = True
                 self.total_receive_errors += 1
-                return m
-            if self.have_prefix_error:
-                return None
-            self.have_prefix_error = True
-            self.total_receive_errors += 1
-            raise MAVError("invalid MAVLink prefix '%s'" % magic)
+                raise MAVError("invalid MAVLink prefix '%s'" % magic)
         self.have_prefix_error = False
-        if self.buf_len() >= 3:
-            sbuf = self.buf[self.buf_index : 3 + self.buf_index]
+        if remaining >= 3:
             (magic, self.expected_length, incompat_flags) = cast(
                 ${type_tuple_int_int_int_cast},
-                self.mav20_h3_unpacker.unpack(sbuf),
+                self.mav20_h3_unpacker.unpack_from(buf, idx),
             )
-            if magic == PROTOCOL_MARKER_V2 and (incompat_flags & MAVLINK_IFLAG_SIGNED):
+            if magic == MARKER_V2 and (incompat_flags & IFLAG_SIGNED):
                 self.expected_length += MAVLINK_SIGNATURE_BLOCK_LEN
             self.expected_length += header_len + 2
-        if self.expected_length >= (header_len + 2) and self.buf_len() >= self.expected_length:
-            mbuf = self.buf[self.buf_index : self.buf_index + self.expected_length]
-            self.buf_index += self.expected_length
+        if self.expected_length >= (header_len + 2) and remaining >= self.expected_length:
+            mbuf = buf[idx : idx + self.expected_length]
+            self.buf_index = idx + self.expected_length
             self.expected_length = header_len + 2
             if self.robust_parsing:
                 try:
-                    if magic == PROTOCOL_MARKER_V2 and (incompat_flags & ~MAVLINK_IFLAG_SIGNED) != 0:
+                    if magic == MARKER_V2 and (incompat_flags & ~IFLAG_SIGNED) != 0:
                         raise MAVError("invalid incompat_flags 0x%x 0x%x %u" % (incompat_flags, magic, self.expected_length))
                     m = self.decode(mbuf)
                 except MAVError as reason:
                     m = MAVLink_bad_data(mbuf, reason.message)
                     self.total_receive_errors += 1
             else:
-                if magic == PROTOCOL_MARKER_V2 and (incompat_flags & ~MAVLINK_IFLAG_SIGNED) != 0:
+                if magic == MARKER_V2 and (incompat_flags & ~IFLAG_SIGNED) != 0:
                     raise MAVError("invalid incompat_flags 0x%x 0x%x %u" % (incompat_flags, magic, self.expected_length))
                 m = self.decode(mbuf)
+            if self.buf_index > 4096:
+                # reclaim consumed bytes so a partially drained buffer does
+                # not keep growing under sustained load; the occasional del
+                # amortises across many parses
+                del self.buf[: self.buf_index]
+                self.buf_index = 0
             return m
         return None
 
+    def parse_bytes(self, s${type_intseq})${type_optional_mavlink_message_list_ret}:
+        """input some data bytes, possibly returning a list of new messages.
+
+        The buffer is extended once and then drained in a single loop,
+        avoiding the per-message re-entry through parse_char.
+        """
+        self.buf.extend(s)
+        self.total_bytes_received += len(s)
+        msgs${type_mavlink_message_list} = []
+        while True:
+            m = self.__parse_char_legacy()
+            if m is None:
+                break
+            msgs.append(m)
+            self.total_packets_received += 1
+            self.__callbacks(m)
+        # XXX The idea here is if we've read something and there's nothing left in
+        # the buffer, reset it to 0 which frees the memory
+        if self.buf_len() == 0 and self.buf_index != 0:
+            self.buf = bytearray()
+            self.buf_index = 0
+        if len(msgs) == 0:
+            return None
+        return msgs
+
     def parse_buffer(self, s${type_intseq})${type_optional_mavlink_message_list_ret}:
         """input some data bytes, possibly returning a list of new messages"""
-        m = self.parse_char(s)
-        if m is None:
-            return None
-        ret = [m]
+        return self.parse_bytes(s)
+
+    def parse_stream(self, data${type_intseq})${type_mavlink_message_list_ret}:
+        """bulk-parse a byte stream (e.g. a whole log file), returning all messages.
+
+        Intended for offline replay: runs of garbage between frames are
+        skipped with a C-level scan for the next protocol marker and
+        returned as a single coalesced MAVLink_bad_data each, instead of
+        one BAD_DATA message per garbage byte.
+        """
+        self.buf.extend(data)
+        self.total_bytes_received += len(data)
+        buf = self.buf
+        msgs${type_mavlink_message_list} = []
         while True:
-            m = self.parse_char(b"")
-            if m is None:
-                return ret
-            ret.append(m)
+            idx = self.buf_index
+            if len(buf) - idx <= 0:
+                break
+            first = buf[idx]
+            if first != PROTOCOL_MARKER_V1 and first != PROTOCOL_MARKER_V2:
+                i1 = buf.find(_MARKER_V1_BYTE, idx)
+                i2 = buf.find(_MARKER_V2_BYTE, idx)
+                if i1 < 0 or (0 <= i2 < i1):
+                    i1 = i2
+                nxt = i1 if i1 >= 0 else len(buf)
+                m = MAVLink_bad_data(buf[idx:nxt], "Bad prefix")
+                self.buf_index = nxt
+                self.total_receive_errors += 1
+            else:
+                m = self.__parse_char_legacy()
+                if m is None:
+                    break
+            msgs.append(m)
+            self.total_packets_received += 1
+            self.__callbacks(m)
+        if self.buf_len() == 0 and self.buf_index != 0:
+            self.buf = bytearray()
+            self.buf_index = 0
+        return msgs
 
     def check_signature(self, msgbuf${type_bytearray}, srcSystem${type_int}, srcComponent${type_int})${type_bool_ret}:
         """check signature on incoming message"""
-        assert self.signing.secret_key is not None
+        signing = self.signing
+        assert signing.secret_key is not None
 
         timestamp_buf = msgbuf[-12:-6]
         link_id = msgbuf[-13]
@@ -974,92 +1231,93 @@ class MAVLink(object):
 
         # see if the timestamp is acceptable
         stream_key = (link_id, srcSystem, srcComponent)
-        if stream_key in self.signing.stream_timestamps:
-            if timestamp <= self.signing.stream_timestamps[stream_key]:
+        if stream_key in signing.stream_timestamps:
+            if timestamp <= signing.stream_timestamps[stream_key]:
                 # reject old timestamp
                 logger.info("old timestamp")
                 return False
         else:
             # a new stream has appeared. Accept the timestamp if it is at most
             # one minute behind our current timestamp
-            if timestamp + 6000 * 1000 < self.signing.timestamp:
-                logger.info("bad new stream %s %s", timestamp / (100.0 * 1000 * 60 * 60 * 24 * 365), self.signing.timestamp / (100.0 * 1000 * 60 * 60 * 24 * 365))
+            if timestamp + 6000 * 1000 < signing.timestamp:
+                logger.info("bad new stream %s %s", timestamp / (100.0 * 1000 * 60 * 60 * 24 * 365), signing.timestamp / (100.0 * 1000 * 60 * 60 * 24 * 365))
                 return False
-            self.signing.stream_timestamps[stream_key] = timestamp
+            signing.stream_timestamps[stream_key] = timestamp
             logger.info("new stream")
 
-        h = hashlib.new("sha256")
-        h.update(self.signing.secret_key)
-        h.update(msgbuf[:-6])
-        sig1 = h.digest()[:6]
-        sig2 = msgbuf[-6:]
-        if sig1 != sig2:
+        sig1 = _sha256(signing.secret_key + msgbuf[:-6]).digest()[:6]
+        if not hmac.compare_digest(sig1, bytes(msgbuf[-6:])):
             logger.info("sig mismatch")
             return False
 
         # the timestamp we next send with is the max of the received timestamp and
         # our current timestamp
-        self.signing.timestamp = max(self.signing.timestamp, timestamp)
+        signing.timestamp = max(signing.timestamp, timestamp)
         return True
 
     def decode(self, msgbuf${type_bytearray})${type_mavlink_message_ret}:
         """decode a buffer as a MAVLink message"""
-        # decode the header
-        if msgbuf[0] != PROTOCOL_MARKER_V1:
+        if _PY2 and type(msgbuf) is not bytearray:
+            msgbuf = bytearray(msgbuf)
+        # decode the header; every field is byte-sized except the MAVLink2
+        # message id, so index the buffer directly rather than paying for a
+        # Struct call per frame
+        if len(msgbuf) < HEADER_LEN_V1:
+            raise MAVError("Unable to unpack MAVLink header: need %u bytes, got %u" % (HEADER_LEN_V1, len(msgbuf)))
+        magic = msgbuf[0]
+        mlen = msgbuf[1]
+        if magic == PROTOCOL_MARKER_V1:
+            headerlen = 6
+            incompat_flags = 0
+            compat_flags = 0
+            seq = msgbuf[2]
+            srcSystem = msgbuf[3]
+            srcComponent = msgbuf[4]
+            msgId = msgbuf[5]
+        elif magic == PROTOCOL_MARKER_V2:
             headerlen = 10
-            try:
-                magic, mlen, incompat_flags, compat_flags, seq, srcSystem, srcComponent, msgIdlow, msgIdhigh = cast(
-                    ${type_tuple_bytes_eight_int_cast},
-                    self.mav20_unpacker.unpack(msgbuf[:headerlen]),
-                )
-            except struct.error as emsg:
-                raise MAVError("Unable to unpack MAVLink header: %s" % emsg)
-            msgId = msgIdlow | (msgIdhigh << 16)
-            mapkey = msgId
+            if len(msgbuf) < HEADER_LEN_V2:
+                raise MAVError("Unable to unpack MAVLink header: need %u bytes, got %u" % (HEADER_LEN_V2, len(msgbuf)))
+            incompat_flags = msgbuf[2]
+            compat_flags = msgbuf[3]
+            seq = msgbuf[4]
+            srcSystem = msgbuf[5]
+            srcComponent = msgbuf[6]
+            msgId = msgbuf[7] | (msgbuf[8] << 8) | (msgbuf[9] << 16)
         else:
-            headerlen = 6
-            try:
-                magic, mlen, seq, srcSystem, srcComponent, msgId = cast(
-                    ${type_tuple_bytes_five_int_cast},
-                    self.mav10_unpacker.unpack(msgbuf[:headerlen]),
-                )
-                incompat_flags = 0
-                compat_flags = 0
-            except struct.error as emsg:
-                raise MAVError("Unable to unpack MAVLink header: %s" % emsg)
-            mapkey = msgId
+            raise MAVError("invalid MAVLink prefix '{}'".format(hex(magic)))
         if (incompat_flags & MAVLINK_IFLAG_SIGNED) != 0:
             signature_len = MAVLINK_SIGNATURE_BLOCK_LEN
         else:
             signature_len = 0
-
-        if ord(magic) != PROTOCOL_MARKER_V1 and ord(magic) != PROTOCOL_MARKER_V2:
-            raise MAVError("invalid MAVLink prefix '{}'".format(hex(ord(magic))))
-        if mlen != len(msgbuf) - (headerlen + 2 + signature_len):
-            raise MAVError("invalid MAVLink message length. Got %u expected %u, msgId=%u headerlen=%u" % (len(msgbuf) - (headerlen + 2 + signature_len), mlen, msgId, headerlen))
-
-        if mapkey not in mavlink_map:
+        # end of the payload within msgbuf; used for the length check, the
+        # CRC, the checksum field and the payload slice below
+        payload_end = len(msgbuf) - 2 - signature_len
+        if mlen != payload_end - headerlen:
+            raise MAVError("invalid MAVLink message length. Got %u expected %u, msgId=%u headerlen=%u" % (payload_end - headerlen, mlen, msgId, headerlen))
+
+        # decode the payload; a single .get() replaces the membership test
+        # plus the subscript lookup
+        msgtype = mavlink_map.get(msgId)
+        if msgtype is None:
             return MAVLink_unknown(msgId, msgbuf)
-
-        # decode the payload
-        msgtype = mavlink_map[mapkey]
-        order_map = msgtype.orders
-        len_map = msgtype.lengths
         crc_extra = msgtype.crc_extra
 
         # decode the checksum
         try:
             (crc,) = cast(
                 ${type_tuple_int_cast},
-                self.mav_csum_unpacker.unpack(msgbuf[-(2 + signature_len) :][:2]),
+                _CSUM_UNPACK(msgbuf, payload_end),
             )
         except struct.error as emsg:
             raise MAVError("Unable to unpack MAVLink CRC: %s" % emsg)
-        crcbuf = msgbuf[1 : -(2 + signature_len)]
+        # a single view serves the CRC, the truncated-payload copy and the
+        # payload slice without intermediate bytearray copies
+        mv = memoryview(msgbuf)
+        crc2 = x25crc(mv[1:payload_end])
         if ${crc_extra}:
             # using CRC extra
-            crcbuf.append(crc_extra)
-        crc2 = x25crc(crcbuf)
+            crc2.accumulate_byte(crc_extra)
         if crc != crc2.crc and not MAVLINK_IGNORE_CRC:
             raise MAVError("invalid MAVLink CRC in msgID %u 0x%04x should be 0x%04x" % (msgId, crc, crc2.crc))
 
@@ -1090,61 +1348,39 @@ class MAVLink(object):
             if not accept_signature:
                 raise MAVError("Invalid signature")
 
-        csize = msgtype.unpacker.size
-        mbuf = msgbuf[headerlen : -(2 + signature_len)]
-        if len(mbuf) < csize:
-            # zero pad to give right size
-            mbuf.extend([0] * (csize - len(mbuf)))
-        if len(mbuf) < csize:
-            raise MAVError("Bad message of type %s length %u needs %s" % (msgtype, len(mbuf), csize))
-        mbuf = mbuf[:csize]
+        csize = msgtype.csize
+        # construct the message object; unpack() is generated per class with
+        # the field reordering and array slicing baked in
         try:
-            t = cast(
-                ${type_tuple_bytes_int_float_repeat_cast},
-                msgtype.unpacker.unpack(mbuf),
-            )
-        except struct.error as emsg:
-            raise MAVError("Unable to unpack MAVLink payload type=%s payloadLength=%u: %s" % (msgtype, len(mbuf), emsg))
-
-        tlist${type_mavlink_message_assign_attr_list} = list(t)
-        # handle sorted fields
-        if ${sort_fields}:
-            if sum(len_map) == len(len_map):
-                # message has no arrays in it
-                for i in range(0, len(tlist)):
-                    tlist[i] = t[order_map[i]]
+            if mlen >= csize:
+                # full-size payload: unpack straight out of the frame
+                m = msgtype.unpack(msgbuf, headerlen)
             else:
-                # message has some arrays
-                tlist = []
-                for i in range(0, len(order_map)):
-                    order = order_map[i]
-                    L = len_map[order]
-                    tip = sum(len_map[:order])
-                    field = t[tip]
-                    if L == 1 or isinstance(field, bytes):
-                        tlist.append(field)
-                    else:
-                        tlist.append(cast(${type_intseq_floatseq_cast}, list(t[tip : (tip + L)])))
-
-        # terminate any strings
-        for i, elem in enumerate(tlist):
-            if isinstance(elem, bytes):
-                tlist[i] = elem.rstrip(b"\\x00")
-
-        # construct the message object
-        try:
-            # Note that initializers don't follow the Liskov Substitution Principle
-            # therefore it can't be typechecked
-            m = msgtype(*tlist)  # type: ignore
+                # MAVLink2 stripped trailing zeros; restore them in a
+                # right-sized scratch buffer (bytearray(n) is pre-zeroed)
+                mbuf = bytearray(csize)
+                mbuf[:mlen] = mv[headerlen:payload_end]
+                m = msgtype.unpack(mbuf)
+        except struct.error as emsg:
+            raise MAVError("Unable to unpack MAVLink payload type=%s payloadLength=%u: %s" % (msgtype, mlen, emsg))
         except Exception as emsg:
             raise MAVError("Unable to instantiate MAVLink message of type %s : %s" % (msgtype, emsg))
         m._signed = sig_ok
         if m._signed:
             m._link_id = msgbuf[-13]
         m._msgbuf = msgbuf
-        m._payload = msgbuf[6 : -(2 + signature_len)]
+        # record where the payload ends and let get_payload() materialize
+        # the copy on demand
+        m._payload_end = payload_end
         m._crc = crc
-        m._header = MAVLink_header(msgId, incompat_flags, compat_flags, mlen, seq, srcSystem, srcComponent)
+        # the constructor already allocated a header; fill it in place
+        header = m._header
+        header.incompat_flags = incompat_flags
+        header.compat_flags = compat_flags
+        header.mlen = mlen
+        header.seq = seq
+        header.srcSystem = srcSystem
+        header.srcComponent = srcComponent
         return m
 ''',
         xml,
@@ -1155,21 +1391,19 @@ def generate_methods(outf, msgs, enable_type_annotations):
     print("Generating methods")
 
     def field_descriptions(fields):
-        ret = ""
+        lines = []
         for f in fields:
-            field_info = ""
-            if f.units:
-                field_info += "%s " % f.units
+            field_info = "%s " % f.units if f.units else ""
             field_info += "(type:%s" % f.type
             if f.enum:
                 field_info += ", values:%s" % f.enum
             field_info += ")"
-            ret += "        %-18s        : %s %s\n" % (
+            lines.append("        %-18s        : %s %s\n" % (
                 f.name,
                 f.description.strip(),
                 field_info,
-            )
-        return ret
+            ))
+        return "".join(lines)
 
     wrapper = textwrap.TextWrapper(initial_indent="", subsequent_indent="        ")
 
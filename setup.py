@@ -159,5 +159,9 @@ setup (name = 'pymavlink',
             'future',
             'lxml',
        ],
+       extras_require={
+            # compiled CRC-16/MCRF4XX used by the generated decoders when present
+            'fast': ['fastcrc'],
+       },
        cmdclass={'build_py': custom_build_py},
        )